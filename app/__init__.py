@@ -1,3 +1,39 @@
 """
 Road Map Application Package
-""" 
\ No newline at end of file
+"""
+import os
+from flask import Flask, render_template
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def create_app():
+    from app.api.routes import api
+    from app.api.tiles import tiles
+    from app.commands import cache_cli
+    from app.config.config import CACHE_NAMESPACES, CACHE_SNAPSHOTS
+    from app.utils.cache_utils import mount_snapshot
+
+    # Serve cache misses from the configured snapshot files
+    for path in CACHE_SNAPSHOTS:
+        mount_snapshot(path, CACHE_NAMESPACES)
+
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(PROJECT_ROOT, 'templates'),
+        static_folder=os.path.join(PROJECT_ROOT, 'static')
+    )
+    
+    # Register blueprints
+    app.register_blueprint(api, url_prefix='/api')
+    app.register_blueprint(tiles, url_prefix='/tiles')
+    app.cli.add_command(cache_cli)
+    
+    @app.route('/')
+    def index():
+        return render_template('index.html')
+        
+    @app.route('/map')
+    def map():
+        return render_template('map.html')
+        
+    return app
@@ -3,7 +3,10 @@ import logging
 from app.services.vehicle_service import VehicleService
 from app.services.route_service import RouteService
 from app.services.city_service import CityService
-from app.config.config import DEFAULT_FUEL_PRICE
+from app.services.eta_service import EtaService
+from app.services.terrain_service import TerrainService
+from app.config.config import DEFAULT_FUEL_PRICE, ROUTE_COMPARE_MAX_VARIANTS
+from app.utils.http_transport import transport
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,6 +17,8 @@ api = Blueprint('api', __name__)
 vehicle_service = VehicleService()
 route_service = RouteService()
 city_service = CityService()
+eta_service = EtaService()
+terrain_service = TerrainService()
 
 @api.route('/search_cities', methods=['GET'])
 def search_cities():
@@ -60,24 +65,115 @@ def calculate_route():
         
         if not all([start_coords, end_coords]):
             return jsonify({'error': 'الرجاء إدخال نقاط البداية والنهاية'})
+
+        departure_time = None
+        if data.get('departure_time') is not None:
+            try:
+                departure_time = eta_service.parse_departure_time(data['departure_time'])
+            except ValueError:
+                return jsonify({'error': 'الرجاء إدخال وقت انطلاق صحيح'})
             
         # Get route information
         route_info = route_service.get_route(start_coords, end_coords, route_type)
         if not route_info:
             return jsonify({'error': 'لم يتم العثور على مسار'})
+
+        # Adjust durations for the departure time if one is given
+        if departure_time is not None:
+            eta_service.adjust_route(route_info, departure_time)
             
         # Calculate fuel cost if vehicle specs are provided
-        if 'vehicle_specs' in data:
-            fuel_cost = vehicle_service.calculate_fuel_cost(
-                route_info['distance'],
-                data['vehicle_specs']['fuel_consumption'],
-                DEFAULT_FUEL_PRICE
-            )
-            if fuel_cost:
-                route_info['fuel_cost'] = fuel_cost
+        fuel_cost = _calculate_fuel_cost(route_info, data)
+        if fuel_cost:
+            route_info['fuel_cost'] = fuel_cost
                 
         return jsonify(route_info)
         
     except Exception as e:
         logger.error(f"Error calculating route: {e}")
-        return jsonify({'error': 'حدث خطأ أثناء حساب المسار'}) 
\ No newline at end of file
+        return jsonify({'error': 'حدث خطأ أثناء حساب المسار'})
+
+@api.route('/compare_routes', methods=['POST'])
+def compare_routes():
+    try:
+        data = request.get_json()
+        start_coords = data.get('start')
+        end_coords = data.get('end')
+        
+        if not all([start_coords, end_coords]):
+            return jsonify({'error': 'الرجاء إدخال نقاط البداية والنهاية'})
+
+        # Variants are either route type names or {route_type, options} dicts
+        variants = [
+            {'route_type': variant} if isinstance(variant, str) else variant
+            for variant in data.get('variants', ['fastest', 'shortest', 'west_bank'])
+        ]
+        if not variants or len(variants) > ROUTE_COMPARE_MAX_VARIANTS:
+            return jsonify({'error': f'الرجاء اختيار من 1 إلى {ROUTE_COMPARE_MAX_VARIANTS} مسارات للمقارنة'})
+
+        # The selected variant is given by index or by route type name
+        selected = data.get('selected', 0)
+        if isinstance(selected, str):
+            selected = next(
+                (index for index, variant in enumerate(variants) if variant.get('route_type') == selected),
+                None
+            )
+        if isinstance(selected, bool) or not isinstance(selected, int) or not 0 <= selected < len(variants):
+            return jsonify({'error': 'الرجاء اختيار مسار صحيح من المسارات المطلوب مقارنتها'})
+
+        departure_time = None
+        if data.get('departure_time') is not None:
+            try:
+                departure_time = eta_service.parse_departure_time(data['departure_time'])
+            except ValueError:
+                return jsonify({'error': 'الرجاء إدخال وقت انطلاق صحيح'})
+
+        comparison = []
+        for index, (variant, route_info) in enumerate(
+            route_service.compare_routes(start_coords, end_coords, variants)
+        ):
+            entry = {
+                'route_type': variant.get('route_type', 'fastest'),
+                'options': variant.get('options')
+            }
+            if not route_info:
+                entry['error'] = 'لم يتم العثور على مسار'
+                comparison.append(entry)
+                continue
+
+            if departure_time is not None:
+                eta_service.adjust_route(route_info, departure_time)
+            entry['distance'] = route_info['distance']
+            entry['duration'] = route_info['duration']
+            fuel_cost = _calculate_fuel_cost(route_info, data)
+            if fuel_cost:
+                entry['fuel_cost'] = fuel_cost
+
+            # Only the selected variant carries its geometry and details
+            if index == selected:
+                entry['geometry'] = route_info['geometry']
+                entry['instructions'] = route_info['instructions']
+                entry['traffic'] = route_info['traffic']
+            comparison.append(entry)
+
+        return jsonify({'variants': comparison, 'selected': selected})
+        
+    except Exception as e:
+        logger.error(f"Error comparing routes: {e}")
+        return jsonify({'error': 'حدث خطأ أثناء مقارنة المسارات'})
+
+@api.route('/transport_stats', methods=['GET'])
+def transport_stats():
+    return jsonify({'hosts': transport.stats()})
+
+def _calculate_fuel_cost(route_info, data):
+    """Calculate the fuel cost of a route if vehicle specs are provided"""
+    if 'vehicle_specs' not in data:
+        return None
+    return vehicle_service.calculate_fuel_cost(
+        route_info['distance'],
+        data['vehicle_specs']['fuel_consumption'],
+        DEFAULT_FUEL_PRICE,
+        vehicle_specs=data['vehicle_specs'],
+        terrain=terrain_service.get_profile(route_info.get('geometry'))
+    ) 
\ No newline at end of file
@@ -0,0 +1,60 @@
+from flask import Blueprint, Response, abort, jsonify, request
+import click
+import hashlib
+import logging
+from app.services.tile_service import TileService
+from app.config.config import (
+    ROUTE_CACHE_DIR, TILE_CACHE_MAX_AGE, TILE_PREFETCH_MIN_ZOOM, TILE_PREFETCH_MAX_ZOOM
+)
+from app.utils.geo_utils import iter_route_geometries, tiles_along_path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+tiles = Blueprint('tiles', __name__)
+tile_service = TileService()
+
+@tiles.route('/<int:z>/<int:x>/<int:y>')
+@tiles.route('/<int:z>/<int:x>/<int:y>.png')
+def get_tile(z, x, y):
+    if not tile_service.is_valid_tile(z, x, y):
+        abort(404)
+
+    data = tile_service.get_tile(z, x, y)
+    if data is None:
+        abort(502)
+
+    response = Response(data, mimetype='image/png')
+    response.set_etag(hashlib.md5(data).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = TILE_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+@tiles.route('/stats')
+def tile_stats():
+    return jsonify(tile_service.stats())
+
+@tiles.cli.command('prefetch')
+@click.option('--min-zoom', default=TILE_PREFETCH_MIN_ZOOM, show_default=True, help='Lowest zoom level to seed')
+@click.option('--max-zoom', default=TILE_PREFETCH_MAX_ZOOM, show_default=True, help='Highest zoom level to seed')
+@click.option('--buffer', default=1, show_default=True, help='Neighbouring tiles to seed around the route')
+def prefetch(min_zoom, max_zoom, buffer):
+    """Seed the tile cache along all cached route geometries"""
+    if not tile_service.allows_prefetch():
+        raise click.ClickException(
+            f"Refusing to prefetch from {tile_service.upstream_url}: its usage policy forbids bulk "
+            "downloads. Set TILE_UPSTREAM_URL to a tile server that allows prefetching."
+        )
+
+    wanted = set()
+    routes = 0
+    for geometry in iter_route_geometries(ROUTE_CACHE_DIR):
+        routes += 1
+        for z in range(min_zoom, max_zoom + 1):
+            wanted.update((z, x, y) for x, y in tiles_along_path(geometry, z, buffer))
+
+    click.echo(f"Seeding {len(wanted)} tiles from {routes} cached routes")
+    result = tile_service.prefetch(sorted(wanted))
+    click.echo(f"Fetched {result['fetched']}, already cached {result['skipped']}, failed {result['failed']}")
@@ -0,0 +1,55 @@
+import click
+import logging
+import os
+from flask.cli import AppGroup
+from app.config.config import CACHE_NAMESPACES
+from app.utils.cache_utils import write_cache
+from app.utils.snapshot import SnapshotReader, export_snapshot
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+cache_cli = AppGroup('cache', help='Cache snapshot commands')
+
+@cache_cli.command('export')
+@click.argument('path', type=click.Path(dir_okay=False))
+@click.option('--base', type=click.Path(exists=True, dir_okay=False), help='Only include entries newer than this snapshot')
+def export_command(path, base):
+    """Pack the route, vehicle and city caches into a snapshot file"""
+    base_reader = SnapshotReader(base) if base else None
+    try:
+        count = export_snapshot(path, CACHE_NAMESPACES, base_reader)
+    finally:
+        if base_reader is not None:
+            base_reader.close()
+    click.echo(f"Exported {count} entries to {path} ({os.path.getsize(path)} bytes)")
+
+@cache_cli.command('import')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--overwrite', is_flag=True, help='Replace existing cache entries')
+def import_command(paths, overwrite):
+    """Unpack snapshot files (base first, then incrementals) into the cache directories.
+
+    To serve a snapshot in place without unpacking it, list it in the
+    CACHE_SNAPSHOTS environment variable instead.
+    """
+    for path in paths:
+        reader = SnapshotReader(path)
+        written = skipped = 0
+        try:
+            for namespace, cache_key, mtime, data in reader.items():
+                cache_dir = CACHE_NAMESPACES.get(namespace)
+                if cache_dir is None:
+                    skipped += 1
+                    continue
+                cache_file = os.path.join(cache_dir, f"{cache_key}.json")
+                if os.path.exists(cache_file) and not overwrite and os.path.getmtime(cache_file) >= mtime:
+                    skipped += 1
+                    continue
+                if write_cache(cache_key, data, cache_dir):
+                    os.utime(cache_file, (mtime, mtime))
+                    written += 1
+        finally:
+            reader.close()
+        click.echo(f"Imported {written} entries from {path}, skipped {skipped}")
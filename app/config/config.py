@@ -12,15 +12,110 @@ OPENROUTE_API_KEY = os.getenv('OPENROUTE_API_KEY')
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache')
 VEHICLE_CACHE_DIR = os.path.join(CACHE_DIR, 'vehicles')
 ROUTE_CACHE_DIR = os.path.join(CACHE_DIR, 'routes')
+TERRAIN_CACHE_DIR = os.path.join(CACHE_DIR, 'terrain')
+CITY_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'cache', 'cities')
+
+# Cache namespaces included in snapshots
+CACHE_NAMESPACES = {
+    'routes': ROUTE_CACHE_DIR,
+    'vehicles': VEHICLE_CACHE_DIR,
+    'cities': CITY_CACHE_DIR
+}
+
+# Snapshot files served read-only as a fallback for cache misses, newest first
+CACHE_SNAPSHOTS = [path for path in os.getenv('CACHE_SNAPSHOTS', '').split(os.pathsep) if path]
+
+# Negative cache TTLs for failed lookups (seconds)
+VEHICLE_NEGATIVE_CACHE_TTL = int(os.getenv('VEHICLE_NEGATIVE_CACHE_TTL', 3600))
+CITY_NEGATIVE_CACHE_TTL = int(os.getenv('CITY_NEGATIVE_CACHE_TTL', 600))
+ROUTE_NEGATIVE_CACHE_TTL = int(os.getenv('ROUTE_NEGATIVE_CACHE_TTL', 300))
 
 # Create cache directories if they don't exist
 os.makedirs(VEHICLE_CACHE_DIR, exist_ok=True)
 os.makedirs(ROUTE_CACHE_DIR, exist_ok=True)
+os.makedirs(CITY_CACHE_DIR, exist_ok=True)
+os.makedirs(TERRAIN_CACHE_DIR, exist_ok=True)
 
 # API endpoints
 OPENROUTE_BASE_URL = 'https://api.openroute.com/api/v2'
 NOMINATIM_BASE_URL = 'https://nominatim.openstreetmap.org'
 
+# Production server settings
+SERVE_BIND = os.getenv('SERVE_BIND', '0.0.0.0:8000')
+SERVE_WORKERS = int(os.getenv('SERVE_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+SERVE_THREADS = int(os.getenv('SERVE_THREADS', 4))
+SERVE_KEEPALIVE = int(os.getenv('SERVE_KEEPALIVE', 5))  # seconds
+SERVE_TIMEOUT = int(os.getenv('SERVE_TIMEOUT', 60))  # seconds
+SERVE_GRACEFUL_TIMEOUT = int(os.getenv('SERVE_GRACEFUL_TIMEOUT', 45))  # seconds
+
+# Route comparison settings. The pool is sized so that every request thread of a
+# worker can fan out its largest comparison at once without queueing.
+ROUTE_COMPARE_MAX_VARIANTS = 6
+ROUTE_COMPARE_MAX_WORKERS = int(os.getenv('ROUTE_COMPARE_MAX_WORKERS', ROUTE_COMPARE_MAX_VARIANTS * SERVE_THREADS))
+
+# Outbound HTTP transport settings, per upstream
+HTTP_UPSTREAMS = {
+    'nominatim': {
+        'connect_timeout': 5.0,
+        'read_timeout': 10.0,
+        'pool_size': int(os.getenv('NOMINATIM_POOL_SIZE', 10)),
+        'retries': 2,
+        'verify': True
+    },
+    'openroute': {
+        'connect_timeout': 5.0,
+        'read_timeout': 30.0,
+        'pool_size': int(os.getenv('OPENROUTE_POOL_SIZE', ROUTE_COMPARE_MAX_WORKERS)),
+        'retries': 2,
+        'verify': False  # The OpenRoute endpoints are called without SSL verification
+    },
+    'tiles': {
+        'connect_timeout': 5.0,
+        'read_timeout': 10.0,
+        'pool_size': int(os.getenv('TILE_POOL_SIZE', 8)),
+        'retries': 2,
+        'verify': True
+    }
+}
+HTTP_RETRY_BACKOFF = 0.25  # seconds, doubled on every attempt
+HTTP_RETRY_AFTER_MAX = float(os.getenv('HTTP_RETRY_AFTER_MAX', 10))  # longest Retry-After to wait for, in seconds
+HTTP_USER_AGENT = 'RoadMap/1.0'
+
+# Map tile proxy settings
+TILE_UPSTREAM_URL = os.getenv('TILE_UPSTREAM_URL', 'https://tile.openstreetmap.org/{z}/{x}/{y}.png')
+TILE_CACHE_FILE = os.getenv('TILE_CACHE_FILE', os.path.join(CACHE_DIR, 'tiles.mbtiles'))
+TILE_CACHE_MAX_AGE = int(os.getenv('TILE_CACHE_MAX_AGE', 7 * 24 * 3600))  # seconds
+TILE_REFRESH_AGE = int(os.getenv('TILE_REFRESH_AGE', 7 * 24 * 3600))  # seconds before a stored tile is refetched
+# Tile servers whose usage policy forbids bulk prefetching
+TILE_NO_PREFETCH_HOSTS = ('tile.openstreetmap.org',)
+TILE_MMAP_SIZE = int(os.getenv('TILE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+TILE_MIN_ZOOM = 0
+TILE_MAX_ZOOM = 19
+TILE_PREFETCH_MIN_ZOOM = 8
+TILE_PREFETCH_MAX_ZOOM = 16
+
+# Time-of-day ETA model settings
+ETA_STORE_DIR = os.path.join(CACHE_DIR, 'observations')
+ETA_TIMEZONE = os.getenv('ETA_TIMEZONE', 'Asia/Hebron')
+ETA_MIN_SAMPLES = int(os.getenv('ETA_MIN_SAMPLES', 3))
+ETA_PROFILE_REFRESH = int(os.getenv('ETA_PROFILE_REFRESH', 60))  # seconds
+
+# Terrain settings: directory of SRTM .hgt elevation tiles (e.g. N31E035.hgt)
+DEM_DIR = os.getenv('DEM_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'dem'))
+TERRAIN_SAMPLE_SPACING = float(os.getenv('TERRAIN_SAMPLE_SPACING', 60))  # meters between elevation samples, close to the DEM resolution
+TERRAIN_SMOOTHING_WINDOW = int(os.getenv('TERRAIN_SMOOTHING_WINDOW', 5))  # samples in the moving average applied to elevations
+
+# Grade-adjusted fuel model settings
+DEFAULT_VEHICLE_MASS = 1500  # kg, used when the curb weight is unknown
+VEHICLE_PAYLOAD = 100  # kg, driver and luggage
+ENGINE_EFFICIENCY = 0.25  # share of fuel energy delivered at the wheels
+DESCENT_RECOVERY = 0.3  # share of descent energy saved through engine braking fuel cut
+MIN_CONSUMPTION_FRACTION = 0.2  # lowest share of flat consumption on a descent
+FUEL_ENERGY_DENSITY = {  # J per liter
+    'gasoline': 34.2e6,
+    'diesel': 38.6e6
+}
+
 # Default settings
 DEFAULT_FUEL_PRICE = 7.7  # ILS per liter
 DEFAULT_CURRENCY = {
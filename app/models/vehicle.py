@@ -1,5 +1,13 @@
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Union, get_args, get_origin
+
+# Schema types for the scalar field annotations of VehicleSpecs
+_SCHEMA_TYPES = {
+    str: 'STRING',
+    int: 'INTEGER',
+    float: 'NUMBER',
+    bool: 'BOOLEAN'
+}
 
 @dataclass
 class VehicleSpecs:
@@ -20,6 +28,40 @@ class VehicleSpecs:
     airbags: int
     safety_systems: str
     maintenance: Dict[str, Dict[str, str]]
+    curb_weight: Optional[int] = None
+
+    MAINTENANCE_ITEMS = ('oil_change', 'tire_change', 'service')
+
+    @classmethod
+    def response_schema(cls) -> Dict:
+        """Build the structured-output schema for the fields of this class"""
+        properties = {}
+        for field in fields(cls):
+            if field.name == 'maintenance':
+                interval = {
+                    'type': 'OBJECT',
+                    'properties': {
+                        'distance': {'type': 'STRING'},
+                        'time': {'type': 'STRING'}
+                    },
+                    'required': ['distance', 'time']
+                }
+                properties[field.name] = {
+                    'type': 'OBJECT',
+                    'properties': {item: interval for item in cls.MAINTENANCE_ITEMS},
+                    'required': list(cls.MAINTENANCE_ITEMS)
+                }
+            else:
+                field_type = field.type
+                if get_origin(field_type) is Union:
+                    field_type = next(arg for arg in get_args(field_type) if arg is not type(None))
+                properties[field.name] = {'type': _SCHEMA_TYPES[field_type]}
+
+        return {
+            'type': 'OBJECT',
+            'properties': properties,
+            'required': list(properties)
+        }
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'VehicleSpecs':
@@ -40,7 +82,8 @@ class VehicleSpecs:
             safety_rating=data['safety_rating'],
             airbags=int(data['airbags']),
             safety_systems=data['safety_systems'],
-            maintenance=data['maintenance']
+            maintenance=data['maintenance'],
+            curb_weight=int(data['curb_weight']) if data.get('curb_weight') else None
         )
 
     def to_dict(self) -> Dict:
@@ -61,5 +104,6 @@ class VehicleSpecs:
             'safety_rating': self.safety_rating,
             'airbags': self.airbags,
             'safety_systems': self.safety_systems,
-            'maintenance': self.maintenance
+            'maintenance': self.maintenance,
+            'curb_weight': self.curb_weight
         } 
\ No newline at end of file
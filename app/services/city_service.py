@@ -1,10 +1,10 @@
-import requests
 import json
 import logging
 import os
 from typing import Dict, List, Optional
-from app.config.config import NOMINATIM_BASE_URL
-from app.utils.cache_utils import read_cache, write_cache
+from app.config.config import NOMINATIM_BASE_URL, CITY_CACHE_DIR, CITY_NEGATIVE_CACHE_TTL
+from app.utils.cache_utils import read_cache, write_cache, read_negative_cache, write_negative_cache
+from app.utils.http_transport import transport
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,8 +13,7 @@ logger = logging.getLogger(__name__)
 class CityService:
     def __init__(self):
         self.base_url = NOMINATIM_BASE_URL
-        self.cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'cache', 'cities')
-        os.makedirs(self.cache_dir, exist_ok=True)
+        self.cache_dir = CITY_CACHE_DIR
 
     def search_cities(self, query: str) -> List[Dict]:
         """Search for cities using Nominatim API"""
@@ -24,6 +23,8 @@ class CityService:
             cached_data = read_cache(cache_key, self.cache_dir)
             if cached_data:
                 return cached_data
+            if read_negative_cache(cache_key, self.cache_dir, CITY_NEGATIVE_CACHE_TTL):
+                return []
 
             # Prepare request parameters
             params = {
@@ -36,11 +37,7 @@ class CityService:
             }
 
             # Make request to Nominatim API
-            response = requests.get(
-                f"{self.base_url}/search",
-                params=params,
-                headers={'User-Agent': 'RoadMap/1.0'}
-            )
+            response = transport.get('nominatim', f"{self.base_url}/search", params=params)
             
             if response.status_code != 200:
                 logger.error(f"Error from Nominatim API: {response.status_code}")
@@ -48,6 +45,9 @@ class CityService:
 
             # Parse response
             results = response.json()
+            if not results:
+                write_negative_cache(cache_key, self.cache_dir, 'no results')
+                return []
             
             # Format results for Select2
             formatted_results = []
@@ -76,6 +76,8 @@ class CityService:
             cached_data = read_cache(cache_key, self.cache_dir)
             if cached_data:
                 return cached_data
+            if read_negative_cache(cache_key, self.cache_dir, CITY_NEGATIVE_CACHE_TTL):
+                return None
 
             # Prepare request parameters
             params = {
@@ -86,11 +88,7 @@ class CityService:
             }
 
             # Make request to Nominatim API
-            response = requests.get(
-                f"{self.base_url}/reverse",
-                params=params,
-                headers={'User-Agent': 'RoadMap/1.0'}
-            )
+            response = transport.get('nominatim', f"{self.base_url}/reverse", params=params)
             
             if response.status_code != 200:
                 logger.error(f"Error from Nominatim API: {response.status_code}")
@@ -98,6 +96,10 @@ class CityService:
 
             # Parse response
             result = response.json()
+            if 'error' in result:
+                logger.info(f"No city found at {lat}, {lon}: {result['error']}")
+                write_negative_cache(cache_key, self.cache_dir, result['error'])
+                return None
             
             # Extract relevant information
             city_info = {
@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Union
+from dateutil import parser, tz
+from app.config.config import ETA_STORE_DIR, ETA_TIMEZONE, ETA_MIN_SAMPLES, ETA_PROFILE_REFRESH
+from app.services.route_service import RouteService
+from app.utils.observation_store import ObservationStore, route_step_keys
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class EtaService:
+    """Time-of-day duration model built from observed segment durations.
+
+    Keeps the summed speed and sample count of every (route step, hour of the
+    week) pair seen in the observation store. The map is sparse, so steps with
+    only a few observations cost one entry each rather than a full week of
+    slots. Steps are keyed by route variant and way_points range. Profiles are
+    updated incrementally from the append-only store, so a refresh only reads
+    records added since the previous one, and adjusting a route is one
+    dictionary lookup per step.
+    """
+
+    def __init__(self, store: Optional[ObservationStore] = None):
+        self.store = store if store is not None else ObservationStore(ETA_STORE_DIR)
+        self.timezone = tz.gettz(ETA_TIMEZONE)
+        self._profiles: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        self._processed = 0
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def hour_of_week(self, timestamp: float) -> int:
+        """Get the local hour of the week (0 = Monday 00:00) for a timestamp"""
+        local = datetime.fromtimestamp(timestamp, self.timezone)
+        return local.weekday() * 24 + local.hour
+
+    def parse_departure_time(self, value: Union[str, int, float]) -> float:
+        """Parse an epoch or ISO 8601 departure time, assuming local time if naive.
+
+        Raises ValueError if the value is not a valid departure time.
+        """
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f"Invalid departure time: {value!r}")
+        if isinstance(value, str):
+            departure = parser.isoparse(value)
+            if departure.tzinfo is None:
+                departure = departure.replace(tzinfo=self.timezone)
+            timestamp = departure.timestamp()
+        else:
+            timestamp = float(value)
+
+        # Reject epochs that cannot be placed on the local calendar
+        try:
+            datetime.fromtimestamp(timestamp, self.timezone)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"Invalid departure time: {value!r}")
+        return timestamp
+
+    def refresh(self, force: bool = False) -> int:
+        """Fold records appended since the last refresh into the profiles"""
+        with self._lock:
+            if not force and time.time() - self._last_refresh < ETA_PROFILE_REFRESH:
+                return 0
+
+            added = 0
+            for timestamp, seg_key, _, duration, distance in self.store.iter_records(self._processed):
+                added += 1
+                if duration <= 0 or distance <= 0:
+                    continue
+                key = (seg_key, self.hour_of_week(timestamp))
+                speed_sum, count = self._profiles.get(key, (0.0, 0))
+                self._profiles[key] = (speed_sum + distance / duration, count + 1)
+
+            self._processed += added
+            self._last_refresh = time.time()
+            return added
+
+    def expected_speed(self, seg_key: int, hour: int) -> Optional[float]:
+        """Get the mean observed speed of a segment in an hour of the week"""
+        speed_sum, count = self._profiles.get((seg_key, hour), (0.0, 0))
+        if count < ETA_MIN_SAMPLES:
+            return None
+        return speed_sum / count
+
+    def adjust_route(self, route_info: Dict, departure_time: float) -> Dict:
+        """Adjust step and segment durations and traffic levels for a departure time.
+
+        Steps are walked in order so that each is looked up at the hour it is
+        actually reached. Steps without enough observations keep their upstream
+        duration, and segment durations are rebuilt from their steps.
+        """
+        self.refresh()
+
+        steps = route_info.get('instructions', [])
+        step_keys = route_step_keys(route_info)
+        if not any(key is not None for key in step_keys):
+            return route_info
+
+        clock = departure_time
+        segment_durations: Dict[int, float] = {}
+        for step, step_key in zip(steps, step_keys):
+            duration = step.get('duration', 0)
+            distance = step.get('distance', 0)
+            if step_key is not None and distance:
+                speed = self.expected_speed(step_key, self.hour_of_week(clock))
+                if speed:
+                    duration = distance / speed
+                    step['duration'] = round(duration, 1)
+            clock += duration
+            index = step.get('segment', 0)
+            segment_durations[index] = segment_durations.get(index, 0.0) + duration
+
+        segments = route_info.get('traffic', {}).get('segments', [])
+        for index, segment in enumerate(segments):
+            if index in segment_durations:
+                segment['duration'] = round(segment_durations[index], 1)
+                segment['traffic_level'] = RouteService._calculate_traffic_level(
+                    segment_durations[index],
+                    segment.get('distance', 0)
+                )
+
+        route_info['static_duration'] = route_info.get('duration', 0)
+        route_info['duration'] = round(sum(segment_durations.values()), 1)
+        if 'traffic' in route_info:
+            route_info['traffic']['total_duration'] = route_info['duration']
+        route_info['departure_time'] = datetime.fromtimestamp(departure_time, self.timezone).isoformat()
+        return route_info
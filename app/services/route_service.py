@@ -1,15 +1,36 @@
 import httpx
+import hashlib
 import json
 import logging
-import ssl
-from typing import Dict, Optional, List
-from app.config.config import OPENROUTE_API_KEY, OPENROUTE_BASE_URL, ROUTE_CACHE_DIR
-from app.utils.cache_utils import read_cache, write_cache
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, List, Tuple
+from app.config.config import (
+    OPENROUTE_API_KEY, OPENROUTE_BASE_URL, ROUTE_CACHE_DIR, ROUTE_NEGATIVE_CACHE_TTL,
+    ROUTE_COMPARE_MAX_WORKERS, ETA_STORE_DIR
+)
+from app.utils.cache_utils import read_cache, write_cache, read_negative_cache, write_negative_cache
+from app.utils.http_transport import transport
+from app.utils.observation_store import ObservationStore, hash_key, route_step_keys
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Upstream status codes meaning the request itself cannot be routed, as opposed
+# to transient failures that are worth retrying straight away
+ROUTE_NOT_FOUND_STATUS_CODES = (400, 404)
+
+# OpenRoute preference for each route type. `west_bank` is a fastest route that
+# only differs by allowing travel through Israel (no avoid_countries).
+ROUTE_PREFERENCES = {
+    'fastest': 'fastest',
+    'shortest': 'shortest',
+    'recommended': 'recommended',
+    'west_bank': 'fastest'
+}
+
 class RouteService:
     def __init__(self):
         self.api_key = OPENROUTE_API_KEY
@@ -17,33 +38,68 @@ class RouteService:
             'Authorization': self.api_key,
             'Content-Type': 'application/json'
         }
-        # Create a custom SSL context
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        
-        # Configure client with custom SSL context
-        self.client = None
-
-    def _get_client(self):
-        """Get or create a client instance"""
-        if self.client is None:
-            self.client = httpx.Client(
-                timeout=30.0,
-                verify=False,  # Disable SSL verification
-                follow_redirects=True,
-                http2=True
+        # Pool used to fan route variants out to the upstream concurrently
+        self.executor = None
+        self._executor_lock = threading.Lock()
+
+        # Observed segment durations for the time-of-day ETA model
+        self.observations = ObservationStore(ETA_STORE_DIR)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or create the executor for concurrent route requests"""
+        with self._executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=ROUTE_COMPARE_MAX_WORKERS,
+                    thread_name_prefix='route-compare'
+                )
+        return self.executor
+
+    def close(self):
+        """Wait for in-flight route requests and shut down the executor"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    @staticmethod
+    def _options_suffix(options: Optional[Dict]) -> str:
+        """Build a stable cache key suffix for custom route options"""
+        if not options:
+            return ''
+        digest = hashlib.md5(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"_{digest[:12]}"
+
+    def compare_routes(self, start_coords: Dict, end_coords: Dict, variants: List[Dict]) -> List[Tuple[Dict, Optional[Dict]]]:
+        """Get several route variants concurrently.
+
+        Each variant is a dict with a `route_type` and optional `options`, and is
+        fetched and cached exactly as a single `get_route` call would be. Results
+        are returned in the order of `variants`.
+        """
+        executor = self._get_executor()
+        futures = [
+            executor.submit(
+                self.get_route,
+                start_coords,
+                end_coords,
+                variant.get('route_type', 'fastest'),
+                variant.get('options')
             )
-        return self.client
+            for variant in variants
+        ]
+        return [(variant, future.result()) for variant, future in zip(variants, futures)]
 
-    def get_route(self, start_coords: Dict, end_coords: Dict, route_type: str = 'fastest') -> Optional[Dict]:
+    def get_route(self, start_coords: Dict, end_coords: Dict, route_type: str = 'fastest', options: Optional[Dict] = None) -> Optional[Dict]:
         """Get route information using OpenRoute API"""
         try:
             # Check cache first
-            cache_key = f"{start_coords['latitude']}_{start_coords['longitude']}_{end_coords['latitude']}_{end_coords['longitude']}_{route_type}"
+            cache_key = f"{start_coords['latitude']}_{start_coords['longitude']}_{end_coords['latitude']}_{end_coords['longitude']}_{route_type}{self._options_suffix(options)}"
             cached_data = read_cache(cache_key, ROUTE_CACHE_DIR)
             if cached_data:
                 return cached_data
+            if read_negative_cache(cache_key, ROUTE_CACHE_DIR, ROUTE_NEGATIVE_CACHE_TTL):
+                logger.info(f"Skipping recently failed route: {cache_key}")
+                return None
 
             # Prepare coordinates
             coordinates = [
@@ -56,7 +112,7 @@ class RouteService:
                 "coordinates": coordinates,
                 "language": "en",
                 "units": "km",
-                "preference": route_type,
+                "preference": ROUTE_PREFERENCES.get(route_type, 'fastest'),
                 "options": {
                     "avoid_borders": "all",
                     "avoid_highways": True
@@ -67,6 +123,10 @@ class RouteService:
             if route_type != 'west_bank':
                 body["options"]["avoid_countries"] = ["ISR"]
 
+            # Apply custom options on top of the route type defaults
+            if options:
+                body["options"].update(options)
+
             # Try different API endpoints
             endpoints = [
                 f"{OPENROUTE_BASE_URL}/directions/driving-car",
@@ -74,37 +134,51 @@ class RouteService:
                 "https://api.openroute.com/v2/directions/driving-car"
             ]
 
-            response = None
-            client = self._get_client()
+            # Record how each endpoint failed: a route is only negative-cached when
+            # an endpoint reported a routing error and none failed transiently
+            data = None
+            routing_error = None
+            transient_failure = False
             for endpoint in endpoints:
                 try:
-                    response = client.post(
+                    # Directions requests only read data, so they are safe to retry
+                    response = transport.post(
+                        'openroute',
                         endpoint,
+                        idempotent=True,
                         headers=self.headers,
                         json=body
                     )
-                    response.raise_for_status()
-                    break
                 except httpx.HTTPError as e:
-                    logger.warning(f"Failed to connect to {endpoint}: {str(e)}")
-                    continue
-                except httpx.RequestError as e:
                     logger.warning(f"Request error for {endpoint}: {str(e)}")
+                    transient_failure = True
                     continue
 
-            if not response:
+                if not response.is_error:
+                    data = response.json()
+                    break
+
+                logger.warning(f"Failed to connect to {endpoint}: status {response.status_code}")
+                if response.status_code >= 500 or response.status_code == 429:
+                    transient_failure = True
+                elif routing_error is None:
+                    routing_error = self._routing_error(response)
+
+            if data is None:
                 logger.error("All API endpoints failed")
+                if routing_error is not None and not transient_failure:
+                    write_negative_cache(cache_key, ROUTE_CACHE_DIR, routing_error)
                 return None
 
-            data = response.json()
-
             # Check if we have routes in the response
             if not data.get('routes'):
                 logger.error("No routes found in response")
+                write_negative_cache(cache_key, ROUTE_CACHE_DIR, 'no routes')
                 return None
 
             # Process the route information
             route_info = {
+                'variant': f"{route_type}{self._options_suffix(options)}",
                 'distance': 0,
                 'duration': 0,
                 'geometry': [],
@@ -136,14 +210,16 @@ class RouteService:
 
             # Extract instructions
             if 'segments' in route:
-                for segment in route['segments']:
+                for index, segment in enumerate(route['segments']):
                     if 'steps' in segment:
                         for step in segment['steps']:
                             route_info['instructions'].append({
                                 'type': step.get('type', ''),
                                 'instruction': step.get('instruction', ''),
                                 'distance': step.get('distance', 0),
-                                'duration': step.get('duration', 0)
+                                'duration': step.get('duration', 0),
+                                'way_points': step.get('way_points', []),
+                                'segment': index
                             })
 
                     # Add traffic information for this segment
@@ -168,6 +244,9 @@ class RouteService:
             route_info['traffic']['total_distance'] = route_info['distance']
             route_info['traffic']['total_duration'] = route_info['duration']
 
+            # Record the observed segment durations
+            self._record_observations(cache_key, route_info)
+
             # Cache the results
             write_cache(cache_key, route_info, ROUTE_CACHE_DIR)
 
@@ -177,7 +256,36 @@ class RouteService:
             logger.error(f"Error getting route: {str(e)}")
             return None
 
-    def _calculate_traffic_level(self, duration: float, distance: float) -> str:
+    @staticmethod
+    def _routing_error(response: httpx.Response) -> Optional[str]:
+        """Describe an OpenRoute routing error response, or None for any other error.
+
+        OpenRoute reports unroutable requests as 400/404 with an `error` object
+        carrying a code. Other 404s, such as a missing fallback path, are not
+        routing errors.
+        """
+        if response.status_code not in ROUTE_NOT_FOUND_STATUS_CODES:
+            return None
+        try:
+            error = response.json().get('error')
+        except (ValueError, AttributeError):
+            return None
+        if not isinstance(error, dict) or 'code' not in error:
+            return None
+        return f"status {response.status_code}: {error.get('message', error['code'])}"
+
+    def _record_observations(self, cache_key: str, route_info: Dict):
+        """Append the step durations of an upstream result to the observation store"""
+        observed_at = int(time.time())
+        route_key = hash_key(cache_key)
+        self.observations.append(
+            (observed_at, step_key, route_key, step['duration'], step['distance'])
+            for step, step_key in zip(route_info['instructions'], route_step_keys(route_info))
+            if step_key is not None and step['duration'] > 0 and step['distance'] > 0
+        )
+
+    @staticmethod
+    def _calculate_traffic_level(duration: float, distance: float) -> str:
         """Calculate traffic level based on duration and distance"""
         if distance == 0:
             return 'unknown'
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+from app.config.config import DEM_DIR, TERRAIN_CACHE_DIR, TERRAIN_SAMPLE_SPACING, TERRAIN_SMOOTHING_WINDOW
+from app.utils.cache_utils import read_cache, write_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS = 6371000.0  # meters
+HGT_VOID = -32768
+
+class TerrainService:
+    """Elevation profiles of routes from SRTM .hgt tiles.
+
+    Each 1x1 degree tile is memory-mapped on first use as a big-endian int16
+    grid, so sampling a route only pages in the rows it touches. A route is
+    resampled at a fixed spacing close to the DEM resolution and its elevations
+    smoothed with a short moving average, so closely spaced polyline points on
+    curves and metre-scale DEM noise do not inflate the climb. All samples are
+    read together with bilinear interpolation, and profiles with full elevation
+    coverage are cached per route geometry.
+    """
+
+    def __init__(self, dem_dir: str = DEM_DIR):
+        self.dem_dir = dem_dir
+        self._tiles: Dict[tuple, np.memmap] = {}
+        self._missing = set()
+        self._lock = threading.Lock()
+
+    def _get_tile(self, lat: int, lon: int) -> Optional[np.memmap]:
+        """Get the memory-mapped tile whose south-west corner is (lat, lon)"""
+        key = (lat, lon)
+        with self._lock:
+            if key in self._tiles:
+                return self._tiles[key]
+
+            name = f"{'N' if lat >= 0 else 'S'}{abs(lat):02d}{'E' if lon >= 0 else 'W'}{abs(lon):03d}.hgt"
+            path = os.path.join(self.dem_dir, name)
+            # Missing tiles are looked up again on each use so that tiles
+            # added to the DEM directory later are picked up
+            if not os.path.exists(path):
+                if name not in self._missing:
+                    self._missing.add(name)
+                    logger.warning(f"No elevation tile {name} in {self.dem_dir}")
+                return None
+
+            size = int(math.isqrt(os.path.getsize(path) // 2))
+            tile = np.memmap(path, dtype='>i2', mode='r', shape=(size, size))
+            self._tiles[key] = tile
+            self._missing.discard(name)
+            return tile
+
+    def sample(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Sample elevations in meters, NaN where no data is available"""
+        elevations = np.full(lats.shape, np.nan)
+        tile_lats = np.floor(lats).astype(int)
+        tile_lons = np.floor(lons).astype(int)
+
+        for tile_lat, tile_lon in set(zip(tile_lats.tolist(), tile_lons.tolist())):
+            tile = self._get_tile(tile_lat, tile_lon)
+            if tile is None:
+                continue
+
+            mask = (tile_lats == tile_lat) & (tile_lons == tile_lon)
+            n = tile.shape[0]
+            rows = (tile_lat + 1 - lats[mask]) * (n - 1)
+            cols = (lons[mask] - tile_lon) * (n - 1)
+            r0 = np.clip(np.floor(rows).astype(int), 0, n - 2)
+            c0 = np.clip(np.floor(cols).astype(int), 0, n - 2)
+            fr = rows - r0
+            fc = cols - c0
+
+            corners = np.stack([
+                tile[r0, c0], tile[r0, c0 + 1], tile[r0 + 1, c0], tile[r0 + 1, c0 + 1]
+            ]).astype(float)
+            corners[corners == HGT_VOID] = np.nan
+            elevations[mask] = (
+                corners[0] * (1 - fr) * (1 - fc) + corners[1] * (1 - fr) * fc +
+                corners[2] * fr * (1 - fc) + corners[3] * fr * fc
+            )
+
+        return elevations
+
+    @staticmethod
+    def _haversine(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Distances in meters between consecutive points"""
+        lat1, lat2 = np.radians(lats[:-1]), np.radians(lats[1:])
+        dlat = lat2 - lat1
+        dlon = np.radians(lons[1:] - lons[:-1])
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+    @staticmethod
+    def _smooth(elevations: np.ndarray, window: int) -> np.ndarray:
+        """Centered moving average, padding the ends with the edge values"""
+        if window <= 1 or len(elevations) < 3:
+            return elevations
+        window = min(window, len(elevations))
+        padded = np.pad(elevations, (window // 2, window - 1 - window // 2), mode='edge')
+        return np.convolve(padded, np.ones(window) / window, mode='valid')
+
+    def get_profile(self, geometry: List) -> Optional[Dict]:
+        """Get the elevation profile of a [lat, lon] route geometry.
+
+        Returns total climb and descent in meters with per-segment distance (m),
+        elevation change (m) and grade of the resampled, smoothed series, or None
+        without elevation data. Segments are TERRAIN_SAMPLE_SPACING meters long
+        except the last. Gaps in the data
+        are interpolated and reported through the coverage fraction; only fully
+        covered profiles are cached.
+        """
+        try:
+            if not geometry or len(geometry) < 2:
+                return None
+
+            # Profiles cached without coverage, or with other sampling settings, are recomputed
+            cache_key = hashlib.md5(json.dumps(geometry).encode('utf-8')).hexdigest()
+            cached_data = read_cache(cache_key, TERRAIN_CACHE_DIR)
+            if (cached_data and cached_data.get('spacing') == TERRAIN_SAMPLE_SPACING
+                    and cached_data.get('smoothing') == TERRAIN_SMOOTHING_WINDOW):
+                return cached_data
+
+            points = np.asarray(geometry, dtype=float)[:, :2]
+
+            # Resample the route at a fixed spacing along its length
+            along = np.concatenate([[0.0], np.cumsum(self._haversine(points[:, 0], points[:, 1]))])
+            total = along[-1]
+            if total <= 0:
+                return None
+            positions = np.append(np.arange(0.0, total, TERRAIN_SAMPLE_SPACING), total)
+            lats = np.interp(positions, along, points[:, 0])
+            lons = np.interp(positions, along, points[:, 1])
+            elevations = self.sample(lats, lons)
+
+            # Fill gaps in the data from the neighbouring samples
+            valid = ~np.isnan(elevations)
+            if not valid.any():
+                return None
+            coverage = float(valid.mean())
+            index = np.arange(len(elevations))
+            elevations = np.interp(index, index[valid], elevations[valid])
+            elevations = self._smooth(elevations, TERRAIN_SMOOTHING_WINDOW)
+
+            distances = np.diff(positions)
+            rises = np.diff(elevations)
+            grades = np.divide(rises, distances, out=np.zeros_like(rises), where=distances > 0)
+
+            profile = {
+                'climb': round(float(rises[rises > 0].sum()), 1),
+                'descent': round(abs(float(rises[rises < 0].sum())), 1),
+                'max_grade': round(float(grades.max()), 4),
+                'min_grade': round(float(grades.min()), 4),
+                'distances': np.round(distances, 1).tolist(),
+                'rises': np.round(rises, 2).tolist(),
+                'grades': np.round(grades, 4).tolist(),
+                'coverage': round(coverage, 4),
+                'spacing': TERRAIN_SAMPLE_SPACING,
+                'smoothing': TERRAIN_SMOOTHING_WINDOW
+            }
+
+            # Cache the results only when no sample was interpolated
+            if valid.all():
+                write_cache(cache_key, profile, TERRAIN_CACHE_DIR)
+
+            return profile
+
+        except Exception as e:
+            logger.error(f"Error getting terrain profile: {e}")
+            return None
@@ -0,0 +1,203 @@
+import httpx
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+from app.config.config import (
+    TILE_UPSTREAM_URL, TILE_CACHE_FILE, TILE_MMAP_SIZE, TILE_MIN_ZOOM, TILE_MAX_ZOOM,
+    TILE_REFRESH_AGE, TILE_NO_PREFETCH_HOSTS
+)
+from app.utils.http_transport import transport
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TileStore:
+    """Single-file MBTiles tile store.
+
+    Reads go through per-thread SQLite connections with memory-mapped I/O
+    enabled, so hot tiles are served straight from the page cache. Rows use the
+    MBTiles TMS convention, so callers pass XYZ indices and the store flips y.
+    An extra `fetched_at` column records when each tile was fetched so stale
+    tiles can be refreshed from the upstream.
+    """
+
+    def __init__(self, path: str = TILE_CACHE_FILE, mmap_size: int = TILE_MMAP_SIZE):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._init_schema()
+
+    def _init_schema(self):
+        """Create the MBTiles tables if the file is new"""
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT)')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS tiles ('
+                'zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB, '
+                'fetched_at REAL)'
+            )
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(tiles)')]
+            if 'fetched_at' not in columns:
+                connection.execute('ALTER TABLE tiles ADD COLUMN fetched_at REAL')
+            connection.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS tile_index '
+                'ON tiles (zoom_level, tile_column, tile_row)'
+            )
+            if connection.execute('SELECT COUNT(*) FROM metadata').fetchone()[0] == 0:
+                connection.executemany('INSERT INTO metadata (name, value) VALUES (?, ?)', [
+                    ('name', 'road-map tile cache'),
+                    ('format', 'png'),
+                    ('minzoom', str(TILE_MIN_ZOOM)),
+                    ('maxzoom', str(TILE_MAX_ZOOM))
+                ])
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread and process"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _tms_row(z: int, y: int) -> int:
+        return (2 ** z - 1) - y
+
+    def get(self, z: int, x: int, y: int) -> Optional[Tuple[bytes, float]]:
+        """Read a tile and its fetch time, or None if it is not stored"""
+        row = self._get_connection().execute(
+            'SELECT tile_data, fetched_at FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+            (z, x, self._tms_row(z, y))
+        ).fetchone()
+        return (bytes(row[0]), row[1] or 0.0) if row else None
+
+    def fetched_at(self, z: int, x: int, y: int) -> Optional[float]:
+        """Get the fetch time of a stored tile without reading its data"""
+        row = self._get_connection().execute(
+            'SELECT fetched_at FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+            (z, x, self._tms_row(z, y))
+        ).fetchone()
+        return (row[0] or 0.0) if row else None
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> bool:
+        """Store a tile, replacing any previous copy"""
+        try:
+            with self._write_lock:
+                connection = self._get_connection()
+                connection.execute(
+                    'INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data, fetched_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (z, x, self._tms_row(z, y), sqlite3.Binary(data), time.time())
+                )
+                connection.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error writing tile {z}/{x}/{y}: {e}")
+            return False
+
+class TileService:
+    def __init__(self, store: Optional[TileStore] = None, upstream_url: str = TILE_UPSTREAM_URL):
+        self.store = store or TileStore()
+        self.upstream_url = upstream_url
+        self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'stale_served': 0, 'upstream_errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get the tile cache hit, miss and upstream error counters"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    @staticmethod
+    def is_valid_tile(z: int, x: int, y: int) -> bool:
+        """Check that tile indices are inside the served pyramid"""
+        if z < TILE_MIN_ZOOM or z > TILE_MAX_ZOOM:
+            return False
+        n = 2 ** z
+        return 0 <= x < n and 0 <= y < n
+
+    @staticmethod
+    def _is_stale(fetched_at: float) -> bool:
+        return time.time() - fetched_at > TILE_REFRESH_AGE
+
+    def allows_prefetch(self) -> bool:
+        """Check that the upstream's usage policy does not forbid bulk prefetching"""
+        return urlsplit(self.upstream_url).hostname not in TILE_NO_PREFETCH_HOSTS
+
+    def _fetch_upstream(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """Fetch a tile from the upstream tile server"""
+        url = self.upstream_url.format(z=z, x=x, y=y)
+        try:
+            response = transport.get('tiles', url)
+            if response.status_code != 200:
+                logger.warning(f"Tile upstream returned {response.status_code} for {z}/{x}/{y}")
+                self._count('upstream_errors')
+                return None
+            return response.content
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to fetch tile {z}/{x}/{y}: {str(e)}")
+            self._count('upstream_errors')
+            return None
+
+    def get_tile(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """Get a tile from the store, fetching it on a miss or once it is stale.
+
+        A stale tile is still served if the upstream cannot be reached.
+        """
+        if not self.is_valid_tile(z, x, y):
+            return None
+
+        stored = self.store.get(z, x, y)
+        if stored is not None:
+            data, fetched_at = stored
+            if not self._is_stale(fetched_at):
+                self._count('hits')
+                return data
+            self._count('refreshes')
+        else:
+            self._count('misses')
+
+        fresh = self._fetch_upstream(z, x, y)
+        if fresh is not None:
+            self.store.put(z, x, y, fresh)
+            return fresh
+        if stored is not None:
+            self._count('stale_served')
+            return stored[0]
+        return None
+
+    def prefetch(self, tiles: Iterable[Tuple[int, int, int]]) -> Dict[str, int]:
+        """Seed the store with the given (z, x, y) tiles, skipping fresh ones"""
+        result = {'fetched': 0, 'skipped': 0, 'failed': 0}
+        for z, x, y in tiles:
+            if not self.is_valid_tile(z, x, y):
+                result['skipped'] += 1
+                continue
+            fetched_at = self.store.fetched_at(z, x, y)
+            if fetched_at is not None and not self._is_stale(fetched_at):
+                result['skipped'] += 1
+                continue
+            data = self._fetch_upstream(z, x, y)
+            if data is None:
+                result['failed'] += 1
+                continue
+            self.store.put(z, x, y, data)
+            result['fetched'] += 1
+        return result
@@ -1,21 +1,33 @@
 import google.generativeai as genai
 import json
 import logging
+import numpy as np
 from typing import Dict, Optional
-from app.config.config import GEMINI_API_KEY, VEHICLE_CACHE_DIR
+from app.config.config import (
+    GEMINI_API_KEY, VEHICLE_CACHE_DIR, VEHICLE_NEGATIVE_CACHE_TTL, DEFAULT_VEHICLE_MASS,
+    VEHICLE_PAYLOAD, ENGINE_EFFICIENCY, DESCENT_RECOVERY, MIN_CONSUMPTION_FRACTION,
+    FUEL_ENERGY_DENSITY
+)
 from app.models.vehicle import VehicleSpecs
-from app.utils.cache_utils import read_cache, write_cache
+from app.utils.cache_utils import read_cache, write_cache, read_negative_cache, write_negative_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+GRAVITY = 9.81  # m/s^2
+
 class VehicleService:
     def __init__(self):
         self.api_key = GEMINI_API_KEY
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel('models/gemini-2.0-flash-001')
 
+        # Structured output schema: the VehicleSpecs fields plus an existence flag
+        self.response_schema = VehicleSpecs.response_schema()
+        self.response_schema['properties']['exists'] = {'type': 'BOOLEAN'}
+        self.response_schema['required'].append('exists')
+
     def get_vehicle_specs(self, brand: str, model: str, year: int) -> Optional[VehicleSpecs]:
         """Get vehicle specifications using Gemini API"""
         try:
@@ -24,66 +36,45 @@ class VehicleService:
             cached_data = read_cache(cache_key, VEHICLE_CACHE_DIR)
             if cached_data:
                 return VehicleSpecs.from_dict(cached_data)
+            if read_negative_cache(cache_key, VEHICLE_CACHE_DIR, VEHICLE_NEGATIVE_CACHE_TTL):
+                logger.info(f"Skipping recently failed vehicle lookup: {cache_key}")
+                return None
 
             # Prepare prompt
             prompt = f"""Get detailed specifications for a {year} {brand} {model} car. Include:
             1. Basic specs: brand, model, year, fuel consumption (L/100km)
             2. Technical specs: engine size (cc), cylinders, transmission, fuel type
-            3. Performance: horsepower, torque (Nm), 0-100 km/h acceleration (seconds), top speed (km/h), fuel tank capacity (L)
+            3. Performance: horsepower, torque (Nm), 0-100 km/h acceleration (seconds), top speed (km/h), fuel tank capacity (L), curb weight (kg)
             4. Safety: safety rating, number of airbags, safety systems
             5. Maintenance: oil change interval (km and time), tire change interval (km and time), service interval (km and time)
             
-            Format the response as a JSON object with these exact keys:
-            {{
-                "brand": "{brand}",
-                "model": "{model}",
-                "year": {year},
-                "fuel_consumption": float,
-                "engine_size": integer,
-                "cylinders": integer,
-                "transmission": "string",
-                "fuel_type": "string",
-                "horsepower": integer,
-                "torque": integer,
-                "acceleration": float,
-                "top_speed": integer,
-                "fuel_tank": integer,
-                "safety_rating": "string",
-                "airbags": integer,
-                "safety_systems": "string",
-                "maintenance": {{
-                    "oil_change": {{ "distance": "string", "time": "string" }},
-                    "tire_change": {{ "distance": "string", "time": "string" }},
-                    "service": {{ "distance": "string", "time": "string" }}
-                }}
-            }}
-            
             Important:
-            - Return ONLY the JSON object, no additional text
             - Use exact values for brand, model, and year as provided
-            - Ensure all numeric values are actual numbers, not strings
+            - Set "exists" to false if this brand never produced this model in this year
             """
 
-            # Get response from Gemini
-            response = self.model.generate_content(prompt)
+            # Get response from Gemini as JSON matching the schema
+            response = self.model.generate_content(
+                prompt,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type='application/json',
+                    response_schema=self.response_schema
+                )
+            )
             
             if not response or not response.text:
                 logger.error("Received empty response from Gemini")
+                write_negative_cache(cache_key, VEHICLE_CACHE_DIR, 'empty response')
                 return None
 
-            # Clean and parse response
+            # Parse response
             try:
-                # Clean the response text
-                cleaned_text = response.text.strip()
-                if cleaned_text.startswith('```json'):
-                    cleaned_text = cleaned_text[7:]
-                if cleaned_text.endswith('```'):
-                    cleaned_text = cleaned_text[:-3]
-                cleaned_text = cleaned_text.strip()
+                specs_data = json.loads(response.text)
+                if not specs_data.pop('exists', True):
+                    logger.info(f"Gemini reports no such vehicle: {year} {brand} {model}")
+                    write_negative_cache(cache_key, VEHICLE_CACHE_DIR, 'vehicle does not exist')
+                    return None
 
-                # Parse JSON
-                specs_data = json.loads(cleaned_text)
-                
                 # Create VehicleSpecs object
                 specs = VehicleSpecs.from_dict(specs_data)
                 
@@ -92,31 +83,75 @@ class VehicleService:
                 
                 return specs
                 
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON: {e}")
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                logger.error(f"Failed to parse vehicle specs: {e}")
                 logger.error(f"Response text: {response.text}")
+                write_negative_cache(cache_key, VEHICLE_CACHE_DIR, 'invalid response')
                 return None
                 
         except Exception as e:
             logger.error(f"Error getting vehicle specs: {e}")
             return None
 
-    def calculate_fuel_cost(self, distance_km: float, fuel_consumption: float, fuel_price: float) -> Dict:
-        """Calculate fuel cost for a trip"""
+    def _vehicle_mass(self, vehicle_specs: Optional[Dict]) -> float:
+        """Estimate the loaded mass of a vehicle in kg"""
+        if vehicle_specs and vehicle_specs.get('curb_weight'):
+            return float(vehicle_specs['curb_weight']) + VEHICLE_PAYLOAD
+        if vehicle_specs and vehicle_specs.get('horsepower'):
+            # Typical passenger cars carry about 9 kg per horsepower
+            return min(max(float(vehicle_specs['horsepower']) * 9, 900), 2500) + VEHICLE_PAYLOAD
+        return DEFAULT_VEHICLE_MASS + VEHICLE_PAYLOAD
+
+    def _terrain_fuel_adjustment(self, fuel_consumption: float, terrain: Dict, vehicle_specs: Optional[Dict]) -> float:
+        """Extra liters needed for the climbs and descents of a route.
+
+        Each segment's flat consumption is raised by the fuel needed to lift the
+        vehicle over its rise and lowered by the part of the descent energy saved
+        through engine braking, never below a minimum share of flat consumption.
+        """
+        distances = np.asarray(terrain['distances'], dtype=float)
+        rises = np.asarray(terrain['rises'], dtype=float)
+
+        fuel_type = str((vehicle_specs or {}).get('fuel_type', '')).lower()
+        energy_density = FUEL_ENERGY_DENSITY['diesel' if 'diesel' in fuel_type else 'gasoline']
+        liters_per_meter_lift = self._vehicle_mass(vehicle_specs) * GRAVITY / (ENGINE_EFFICIENCY * energy_density)
+
+        flat = distances / 1000 / 100 * fuel_consumption
+        adjusted = (
+            flat
+            + liters_per_meter_lift * np.clip(rises, 0, None)
+            - DESCENT_RECOVERY * liters_per_meter_lift * np.clip(-rises, 0, None)
+        )
+        adjusted = np.maximum(adjusted, flat * MIN_CONSUMPTION_FRACTION)
+        return float(adjusted.sum() - flat.sum())
+
+    def calculate_fuel_cost(self, distance_km: float, fuel_consumption: float, fuel_price: float,
+                            vehicle_specs: Optional[Dict] = None, terrain: Optional[Dict] = None) -> Dict:
+        """Calculate fuel cost for a trip, adjusted for terrain if a profile is given"""
         try:
             # Calculate fuel needed
             fuel_needed = (distance_km / 100) * fuel_consumption
+            if terrain:
+                fuel_needed += self._terrain_fuel_adjustment(fuel_consumption, terrain, vehicle_specs)
             
             # Calculate total cost
             total_cost = fuel_needed * fuel_price
             
-            return {
+            result = {
                 "fuel_needed_liters": round(fuel_needed, 2),
                 "total_cost": round(total_cost, 2),
                 "consumption_rate": fuel_consumption,
                 "distance_km": distance_km,
                 "fuel_price": fuel_price
             }
+            if terrain:
+                result["climb_m"] = terrain['climb']
+                result["descent_m"] = terrain['descent']
+                result["max_grade"] = terrain['max_grade']
+                result["min_grade"] = terrain['min_grade']
+                if distance_km:
+                    result["effective_consumption_rate"] = round(fuel_needed / distance_km * 100, 2)
+            return result
         except Exception as e:
             logger.error(f"Error calculating fuel cost: {e}")
-            return None 
\ No newline at end of file
+            return None
@@ -1,21 +1,85 @@
+import copy
 import json
 import os
 import logging
-from typing import Dict, Optional, Any
+import time
+from typing import Dict, List, Optional, Any, Tuple
+from app.utils.snapshot import SnapshotReader
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# In-memory copies of preloaded cache directories, keyed by directory then cache key
+_memory_cache: Dict[str, Dict[str, Any]] = {}
+
+# Mounted snapshots per cache directory, as (namespace, reader) pairs in lookup order
+_snapshots: Dict[str, List[Tuple[str, SnapshotReader]]] = {}
+
+# Mounted snapshot readers keyed by absolute snapshot path
+_mounted: Dict[str, SnapshotReader] = {}
+
+def mount_snapshot(path: str, namespaces: Dict[str, str]) -> Optional[SnapshotReader]:
+    """Serve cache misses of the given namespaces from a snapshot file.
+
+    Snapshots are consulted in the order they were mounted, so incremental
+    snapshots should be mounted before their base. Mounting a path that is
+    already mounted returns its existing reader.
+    """
+    mount_path = os.path.abspath(path)
+    if mount_path in _mounted:
+        return _mounted[mount_path]
+
+    try:
+        reader = SnapshotReader(path)
+    except Exception as e:
+        logger.error(f"Error mounting cache snapshot {path}: {e}")
+        return None
+
+    for namespace, cache_dir in namespaces.items():
+        if namespace in reader.entries:
+            _snapshots.setdefault(cache_dir, []).append((namespace, reader))
+    _mounted[mount_path] = reader
+    logger.info(f"Mounted cache snapshot {path} with {len(reader)} entries")
+    return reader
+
+def preload_cache(cache_dir: str) -> int:
+    """Load every entry of a cache directory into memory.
+
+    Called in the server master before forking so that workers share the
+    loaded entries copy-on-write instead of re-reading them from disk.
+    """
+    entries = _memory_cache.setdefault(cache_dir, {})
+    if not os.path.exists(cache_dir):
+        return 0
+
+    for file in os.listdir(cache_dir):
+        if not file.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(cache_dir, file), 'r', encoding='utf-8') as f:
+                entries[file[:-len('.json')]] = json.load(f)
+        except Exception as e:
+            logger.error(f"Error preloading cache file {file}: {e}")
+    return len(entries)
+
 def read_cache(cache_key: str, cache_dir: str) -> Optional[Dict]:
     """Read data from cache"""
     try:
+        entries = _memory_cache.get(cache_dir)
+        if entries is not None and cache_key in entries:
+            return copy.deepcopy(entries[cache_key])
+
         cache_file = os.path.join(cache_dir, f"{cache_key}.json")
-        if not os.path.exists(cache_file):
-            return None
-            
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        for namespace, reader in _snapshots.get(cache_dir, []):
+            data = reader.get(namespace, cache_key)
+            if data is not None:
+                return data
+        return None
     except Exception as e:
         logger.error(f"Error reading cache: {e}")
         return None
@@ -29,14 +93,58 @@ def write_cache(cache_key: str, data: Dict, cache_dir: str) -> bool:
         cache_file = os.path.join(cache_dir, f"{cache_key}.json")
         with open(cache_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+
+        entries = _memory_cache.get(cache_dir)
+        if entries is not None:
+            entries[cache_key] = copy.deepcopy(data)
         return True
     except Exception as e:
         logger.error(f"Error writing cache: {e}")
         return False
 
+def delete_cache(cache_key: str, cache_dir: str) -> bool:
+    """Delete a single cached entry"""
+    try:
+        entries = _memory_cache.get(cache_dir)
+        if entries is not None:
+            entries.pop(cache_key, None)
+
+        cache_file = os.path.join(cache_dir, f"{cache_key}.json")
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        return True
+    except Exception as e:
+        logger.error(f"Error deleting cache: {e}")
+        return False
+
+def _negative_cache_dir(cache_dir: str) -> str:
+    return os.path.join(cache_dir, 'negative')
+
+def read_negative_cache(cache_key: str, cache_dir: str, ttl: int) -> bool:
+    """Check whether a lookup failed recently enough to skip retrying it"""
+    negative_dir = _negative_cache_dir(cache_dir)
+    entry = read_cache(cache_key, negative_dir)
+    if not entry:
+        return False
+    if time.time() - entry.get('timestamp', 0) < ttl:
+        return True
+
+    # Prune the expired entry so failures do not accumulate on disk
+    delete_cache(cache_key, negative_dir)
+    return False
+
+def write_negative_cache(cache_key: str, cache_dir: str, reason: str = '') -> bool:
+    """Record a failed lookup so repeats are answered from cache until the TTL expires"""
+    return write_cache(
+        cache_key,
+        {'timestamp': time.time(), 'reason': reason},
+        _negative_cache_dir(cache_dir)
+    )
+
 def clear_cache(cache_dir: str) -> bool:
     """Clear all cached data"""
     try:
+        _memory_cache.pop(cache_dir, None)
         if not os.path.exists(cache_dir):
             return True
             
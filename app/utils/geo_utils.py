@@ -0,0 +1,62 @@
+import json
+import math
+import os
+from typing import Iterable, List, Sequence, Set, Tuple
+
+def latlon_to_tile(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """Convert a WGS84 coordinate to slippy-map tile indices"""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    n = 2 ** zoom
+    lat_rad = math.radians(lat)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tiles_along_path(points: Sequence[Sequence[float]], zoom: int, buffer: int = 0) -> Set[Tuple[int, int]]:
+    """Get the tiles covered by a [lat, lon] polyline at the given zoom level.
+
+    Consecutive points are interpolated so that long straight segments do not
+    skip the tiles between them, and `buffer` adds a ring of neighbouring tiles.
+    """
+    n = 2 ** zoom
+    tiles = set()
+    previous = None
+    for point in points:
+        current = latlon_to_tile(float(point[0]), float(point[1]), zoom)
+        if previous is None:
+            tiles.add(current)
+        else:
+            steps = max(abs(current[0] - previous[0]), abs(current[1] - previous[1]))
+            for step in range(1, steps + 1):
+                tiles.add((
+                    previous[0] + round((current[0] - previous[0]) * step / steps),
+                    previous[1] + round((current[1] - previous[1]) * step / steps)
+                ))
+            tiles.add(current)
+        previous = current
+
+    if buffer > 0:
+        buffered = set()
+        for x, y in tiles:
+            for dx in range(-buffer, buffer + 1):
+                for dy in range(-buffer, buffer + 1):
+                    if 0 <= y + dy < n:
+                        buffered.add(((x + dx) % n, y + dy))
+        tiles = buffered
+
+    return tiles
+
+def iter_route_geometries(route_dir: str) -> Iterable[List]:
+    """Yield the [lat, lon] geometries of all cached routes in a directory"""
+    if not os.path.isdir(route_dir):
+        return
+    for file in sorted(os.listdir(route_dir)):
+        if not file.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(route_dir, file), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict) and data.get('geometry'):
+            yield data['geometry']
@@ -0,0 +1,169 @@
+import httpx
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from app.config.config import HTTP_UPSTREAMS, HTTP_RETRY_BACKOFF, HTTP_RETRY_AFTER_MAX, HTTP_USER_AGENT
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to repeat after a failed attempt
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+# Response statuses worth retrying for idempotent requests
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+class HttpTransport:
+    """Shared outbound HTTP transport for all services.
+
+    Keeps one pooled keep-alive HTTP/2 client per upstream, configured from
+    HTTP_UPSTREAMS with its own pool size and connect/read timeouts. Idempotent
+    requests are retried with jittered exponential backoff, or after the delay
+    an upstream asks for with Retry-After. Per-host statistics
+    count requests against newly opened connections, so connection reuse can be
+    checked.
+    """
+
+    def __init__(self, upstreams: Optional[Dict[str, Dict]] = None):
+        self.upstreams = upstreams or HTTP_UPSTREAMS
+        self._clients: Dict[str, httpx.Client] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _get_client(self, upstream: str) -> httpx.Client:
+        """Get or create the pooled client of an upstream"""
+        with self._lock:
+            # Connections must not be shared with a forked parent process
+            if self._pid != os.getpid():
+                self._clients = {}
+                self._stats = {}
+                self._pid = os.getpid()
+
+            client = self._clients.get(upstream)
+            if client is None:
+                settings = self.upstreams[upstream]
+                client = httpx.Client(
+                    timeout=httpx.Timeout(
+                        settings['read_timeout'],
+                        connect=settings['connect_timeout']
+                    ),
+                    limits=httpx.Limits(
+                        max_connections=settings['pool_size'],
+                        max_keepalive_connections=settings['pool_size']
+                    ),
+                    headers={'User-Agent': HTTP_USER_AGENT},
+                    verify=settings.get('verify', True),
+                    follow_redirects=True,
+                    http2=True
+                )
+                self._clients[upstream] = client
+            return client
+
+    def _count(self, host: str, field: str):
+        """Increment a per-host counter under the lock so concurrent updates are not lost"""
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                'requests': 0,
+                'new_connections': 0,
+                'retries': 0,
+                'errors': 0
+            })
+            stats[field] += 1
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """Get the delay in seconds requested by a Retry-After header, if any"""
+        value = response.headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def request(self, upstream: str, method: str, url: str, idempotent: Optional[bool] = None,
+                **kwargs) -> httpx.Response:
+        """Send a request through the pooled client of an upstream.
+
+        Requests are retried when idempotent, which defaults to whether the
+        method is; pass idempotent=True for read-only POSTs. Raises
+        httpx.HTTPError if the request still fails after its retries.
+        """
+        client = self._get_client(upstream)
+        host = urlsplit(url).netloc
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + (self.upstreams[upstream].get('retries', 0) if idempotent else 0)
+
+        def trace(event_name, info):
+            if event_name == 'connection.connect_tcp.complete':
+                self._count(host, 'new_connections')
+
+        delay = None
+        for attempt in range(attempts):
+            if attempt > 0:
+                self._count(host, 'retries')
+                if delay is None:
+                    delay = random.uniform(0, HTTP_RETRY_BACKOFF * 2 ** attempt)
+                time.sleep(delay)
+                delay = None
+
+            self._count(host, 'requests')
+            try:
+                response = client.request(method, url, extensions={'trace': trace}, **kwargs)
+            except httpx.TransportError as e:
+                self._count(host, 'errors')
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"Retrying {method} {url} after error: {str(e)}")
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < attempts - 1:
+                delay = self._retry_after(response)
+                if delay is not None and delay > HTTP_RETRY_AFTER_MAX:
+                    logger.warning(f"Not retrying {method} {url}: upstream asked to wait {delay:.0f}s")
+                    return response
+                logger.warning(f"Retrying {method} {url} after status {response.status_code}")
+                continue
+            return response
+
+    def get(self, upstream: str, url: str, **kwargs) -> httpx.Response:
+        return self.request(upstream, 'GET', url, **kwargs)
+
+    def post(self, upstream: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        return self.request(upstream, 'POST', url, idempotent=idempotent, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Get per-host request counts and connection reuse ratios"""
+        with self._lock:
+            report = {}
+            for host, stats in self._stats.items():
+                reused = max(stats['requests'] - stats['new_connections'], 0)
+                report[host] = dict(
+                    stats,
+                    reused_connections=reused,
+                    reuse_ratio=round(reused / stats['requests'], 3) if stats['requests'] else 0.0
+                )
+            return report
+
+    def close(self):
+        """Close all pooled clients and their keep-alive connections"""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients = {}
+
+# Shared transport used by all services
+transport = HttpTransport()
@@ -0,0 +1,143 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Column name and fixed-width array typecode of each observation field
+COLUMNS = (
+    ('timestamp', 'I'),
+    ('segment_key', 'Q'),
+    ('route_key', 'Q'),
+    ('duration', 'f'),
+    ('distance', 'f')
+)
+
+def hash_key(value: str) -> int:
+    """Hash a string key to an unsigned 64-bit integer"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def segment_key(variant: str, start: Sequence[float], end: Sequence[float]) -> int:
+    """Build the key of a route step from its variant and rounded end points.
+
+    The variant (route type plus options hash) is part of the key so that
+    different route types between the same two points never share a profile.
+    """
+    return hash_key(f"{variant}|{start[0]:.4f},{start[1]:.4f}>{end[0]:.4f},{end[1]:.4f}")
+
+def route_step_keys(route_info: Dict) -> List[Optional[int]]:
+    """Get the segment key of every instruction step of a route.
+
+    Steps are located in the geometry through their way_points range. Steps
+    without one (routes cached before way_points were kept) get None.
+    """
+    variant = route_info.get('variant')
+    geometry = route_info.get('geometry') or []
+    keys = []
+    for step in route_info.get('instructions', []):
+        way_points = step.get('way_points') or []
+        if variant is None or len(way_points) != 2 or way_points[1] >= len(geometry):
+            keys.append(None)
+            continue
+        keys.append(segment_key(variant, geometry[way_points[0]], geometry[way_points[1]]))
+    return keys
+
+class ObservationStore:
+    """Append-only columnar store of observed segment durations.
+
+    Each column lives in its own file of fixed-width values, so appending a
+    record is one small write per column and a column can be read in place by
+    memory-mapping its file and viewing it as a typed array.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = os.path.join(self.directory, '.lock')
+
+    def _column_file(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.col")
+
+    def __len__(self) -> int:
+        """Number of complete records, ignoring any partially written tail"""
+        count = None
+        for name, typecode in COLUMNS:
+            path = self._column_file(name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            rows = size // array(typecode).itemsize
+            count = rows if count is None else min(count, rows)
+        return count or 0
+
+    def _truncate_torn_rows(self):
+        """Cut every column back to the common row count.
+
+        An interrupted append can leave some columns longer than others, and
+        appending after such a torn row would misalign every later record.
+        Must be called while holding the append lock.
+        """
+        count = len(self)
+        for name, typecode in COLUMNS:
+            path = self._column_file(name)
+            size = count * array(typecode).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                logger.warning(f"Truncating torn rows from {path}")
+                os.truncate(path, size)
+
+    def append(self, records: Iterable[Sequence]) -> int:
+        """Append (timestamp, segment_key, route_key, duration, distance) records"""
+        columns = [array(typecode) for _, typecode in COLUMNS]
+        for record in records:
+            for column, value in zip(columns, record):
+                column.append(value)
+        if not columns[0]:
+            return 0
+
+        try:
+            # Serialize appends across worker processes so columns stay aligned
+            with open(self._lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self._truncate_torn_rows()
+                    for (name, _), column in zip(COLUMNS, columns):
+                        with open(self._column_file(name), 'ab') as f:
+                            f.write(column.tobytes())
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+            return len(columns[0])
+        except OSError as e:
+            logger.error(f"Error appending observations: {e}")
+            return 0
+
+    def iter_records(self, start: int = 0) -> Iterator[Tuple]:
+        """Iterate over the records from index `start` through memory-mapped columns"""
+        count = len(self)
+        if start >= count:
+            return
+
+        files = []
+        maps = []
+        views = []
+        try:
+            for name, typecode in COLUMNS:
+                f = open(self._column_file(name), 'rb')
+                files.append(f)
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                maps.append(mapped)
+                itemsize = array(typecode).itemsize
+                views.append(memoryview(mapped)[:count * itemsize].cast(typecode))
+
+            for index in range(start, count):
+                yield tuple(view[index] for view in views)
+        finally:
+            for view in views:
+                view.release()
+            for mapped in maps:
+                mapped.close()
+            for f in files:
+                f.close()
@@ -0,0 +1,112 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'RMSNAP\x00\x01'
+SNAPSHOT_VERSION = 1
+
+# magic, version, created timestamp, index offset, index length
+HEADER = struct.Struct('<8sIdQQ')
+
+class SnapshotReader:
+    """Read-only view of a cache snapshot file.
+
+    A snapshot is a header, one zlib-compressed JSON blob per cache entry and a
+    compressed index mapping namespace and key to the blob's offset, length and
+    modification time. The file is memory-mapped, so entries are decompressed
+    on demand straight from the mapping without unpacking the snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, created, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Not a cache snapshot: {path}")
+
+        index = json.loads(zlib.decompress(self._map[index_offset:index_offset + index_length]))
+        self.created = created
+        self.base_created = index.get('base_created')
+        self.entries: Dict[str, Dict[str, list]] = index['entries']
+
+    def get(self, namespace: str, cache_key: str) -> Optional[Dict]:
+        """Read an entry, or None if the snapshot does not contain it"""
+        entry = self.entries.get(namespace, {}).get(cache_key)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        return json.loads(zlib.decompress(self._map[offset:offset + length]))
+
+    def items(self) -> Iterator[Tuple[str, str, float, Dict]]:
+        """Iterate over (namespace, key, modification time, data) of all entries"""
+        for namespace, keys in self.entries.items():
+            for cache_key, (offset, length, mtime) in keys.items():
+                yield namespace, cache_key, mtime, json.loads(zlib.decompress(self._map[offset:offset + length]))
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self.entries.values())
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+def export_snapshot(path: str, namespaces: Dict[str, str], base: Optional[SnapshotReader] = None) -> int:
+    """Pack the cache directories of the given namespaces into a snapshot file.
+
+    With a base snapshot, only entries modified after the base was created are
+    included. Returns the number of entries written.
+    """
+    created = time.time()
+    entries: Dict[str, Dict[str, list]] = {}
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, created, 0, 0))
+
+        for namespace, cache_dir in namespaces.items():
+            keys = entries.setdefault(namespace, {})
+            if not os.path.isdir(cache_dir):
+                continue
+            for file in sorted(os.listdir(cache_dir)):
+                if not file.endswith('.json'):
+                    continue
+                cache_file = os.path.join(cache_dir, file)
+                mtime = os.path.getmtime(cache_file)
+                if base is not None and mtime <= base.created:
+                    continue
+                try:
+                    with open(cache_file, 'r', encoding='utf-8') as entry_file:
+                        data = json.load(entry_file)
+                except Exception as e:
+                    logger.error(f"Skipping unreadable cache file {cache_file}: {e}")
+                    continue
+
+                blob = zlib.compress(
+                    json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                )
+                keys[file[:-len('.json')]] = [f.tell(), len(blob), mtime]
+                f.write(blob)
+
+        index = zlib.compress(json.dumps({
+            'base_created': base.created if base is not None else None,
+            'entries': entries
+        }, ensure_ascii=False).encode('utf-8'))
+        index_offset = f.tell()
+        f.write(index)
+        f.seek(0)
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, created, index_offset, len(index)))
+
+    os.replace(tmp_path, path)
+    return sum(len(keys) for keys in entries.values())
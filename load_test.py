@@ -0,0 +1,62 @@
+"""
+Simple load test for the production server.
+
+Sends requests from a pool of client threads and reports throughput and
+latency percentiles. Run it against `serve.py` with SERVE_WORKERS=1 and then
+with the default worker count to compare throughput. Extra workers only add
+throughput when the machine has spare cores for them, so run the client on a
+separate machine when measuring scaling.
+
+Usage:
+    python load_test.py --url http://localhost:8000/api/search_cities?query=nablus --concurrency 32 --requests 2000
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+_local = threading.local()
+
+def _get_session() -> requests.Session:
+    """Get the keep-alive session for the current client thread"""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def _timed_request(url: str):
+    start = time.perf_counter()
+    try:
+        response = _get_session().get(url, timeout=30)
+        ok = response.status_code < 500
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - start, ok
+
+def run_load_test(url: str, concurrency: int, total_requests: int):
+    """Run the load test and print a summary"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(_timed_request, [url] * total_requests))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    percentiles = statistics.quantiles(latencies, n=100)
+
+    print(f"Requests:    {total_requests} ({errors} errors)")
+    print(f"Concurrency: {concurrency}")
+    print(f"Throughput:  {total_requests / elapsed:.1f} req/s")
+    print(f"Latency p50: {percentiles[49] * 1000:.1f} ms")
+    print(f"Latency p95: {percentiles[94] * 1000:.1f} ms")
+    print(f"Latency p99: {percentiles[98] * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the road map server')
+    parser.add_argument('--url', default='http://localhost:8000/api/search_cities?query=nablus')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    run_load_test(args.url, args.concurrency, args.requests)
@@ -0,0 +1,85 @@
+"""
+Production server entry point.
+
+Runs the application under gunicorn with pre-forked, threaded workers. The app
+and its warm state (SDK imports, service objects and the preloaded cache
+directories) are built once in the master process before forking, so workers
+share that memory copy-on-write instead of each starting cold.
+
+Usage:
+    python serve.py
+"""
+import gc
+import logging
+from gunicorn.app.base import BaseApplication
+from app.config.config import (
+    LOG_FORMAT, LOG_LEVEL, VEHICLE_CACHE_DIR, ROUTE_CACHE_DIR, CITY_CACHE_DIR,
+    SERVE_BIND, SERVE_WORKERS, SERVE_THREADS, SERVE_KEEPALIVE, SERVE_TIMEOUT,
+    SERVE_GRACEFUL_TIMEOUT
+)
+from app.utils.cache_utils import preload_cache
+
+# Configure logging
+logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+def preload_app():
+    """Build the app and load its warm state in the master process"""
+    for cache_dir in (VEHICLE_CACHE_DIR, ROUTE_CACHE_DIR, CITY_CACHE_DIR):
+        count = preload_cache(cache_dir)
+        logger.info(f"Preloaded {count} cache entries from {cache_dir}")
+
+    # Importing app builds the service objects and loads the SDKs once
+    from app import create_app
+    application = create_app()
+
+    # Build the ETA speed profiles once so workers do not each scan the store
+    from app.api.routes import eta_service
+    count = eta_service.refresh(force=True)
+    logger.info(f"Built ETA profiles from {count} observations")
+
+    # Move everything allocated so far out of the collector's generations so
+    # that garbage collection in the workers does not touch (and copy) the
+    # shared pages
+    gc.collect()
+    gc.freeze()
+    return application
+
+def worker_exit(server, worker):
+    """Close upstream clients once the worker has drained its requests"""
+    from app.api.routes import route_service
+    from app.utils.http_transport import transport
+
+    route_service.close()
+    logger.info(f"Worker {worker.pid} upstream connection stats: {transport.stats()}")
+    transport.close()
+
+class ProductionServer(BaseApplication):
+    def __init__(self, application, options=None):
+        self.application = application
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        return self.application
+
+if __name__ == '__main__':
+    options = {
+        'bind': SERVE_BIND,
+        'workers': SERVE_WORKERS,
+        'threads': SERVE_THREADS,
+        'worker_class': 'gthread',
+        'keepalive': SERVE_KEEPALIVE,
+        'timeout': SERVE_TIMEOUT,
+        # Workers get this long after SIGTERM to finish in-flight requests,
+        # including their upstream calls, before being killed
+        'graceful_timeout': SERVE_GRACEFUL_TIMEOUT,
+        'preload_app': True,
+        'worker_exit': worker_exit
+    }
+    ProductionServer(preload_app(), options).run()
@@ -0,0 +1,45 @@
+import os
+from app.utils.observation_store import COLUMNS, ObservationStore
+
+RECORDS = [
+    (1700000000, 11, 21, 30.5, 400.0),
+    (1700000060, 12, 22, 45.0, 650.0),
+    (1700000120, 13, 23, 12.25, 90.0)
+]
+
+def test_append_and_iter(tmp_path):
+    store = ObservationStore(str(tmp_path))
+    assert len(store) == 0
+    assert list(store.iter_records()) == []
+
+    assert store.append(RECORDS[:2]) == 2
+    assert store.append(iter(RECORDS[2:])) == 1
+    assert store.append([]) == 0
+
+    assert len(store) == 3
+    assert list(store.iter_records()) == RECORDS
+    assert list(store.iter_records(2)) == RECORDS[2:]
+    assert list(store.iter_records(5)) == []
+
+def test_reads_ignore_torn_tail(tmp_path):
+    store = ObservationStore(str(tmp_path))
+    store.append(RECORDS[:1])
+
+    # Simulate an append interrupted after writing only the first column
+    with open(os.path.join(str(tmp_path), f"{COLUMNS[0][0]}.col"), 'ab') as f:
+        f.write((99).to_bytes(4, 'little'))
+
+    assert len(store) == 1
+    assert list(store.iter_records()) == RECORDS[:1]
+
+def test_append_after_torn_write(tmp_path):
+    store = ObservationStore(str(tmp_path))
+    store.append(RECORDS[:1])
+
+    with open(os.path.join(str(tmp_path), 'timestamp.col'), 'ab') as f:
+        f.write((99).to_bytes(4, 'little'))
+    with open(os.path.join(str(tmp_path), 'segment_key.col'), 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    store.append(RECORDS[1:])
+    assert list(store.iter_records()) == RECORDS
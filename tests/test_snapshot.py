@@ -0,0 +1,121 @@
+import json
+import os
+import time
+import pytest
+from app import create_app
+from app.utils import cache_utils
+from app.utils.cache_utils import mount_snapshot, read_cache
+from app.utils.snapshot import SnapshotReader, export_snapshot
+
+def _write_entry(cache_dir, cache_key, data, mtime):
+    path = os.path.join(cache_dir, f"{cache_key}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.utime(path, (mtime, mtime))
+
+@pytest.fixture
+def namespaces(tmp_path):
+    dirs = {'routes': tmp_path / 'routes', 'cities': tmp_path / 'cities'}
+    for path in dirs.values():
+        path.mkdir()
+    return {namespace: str(path) for namespace, path in dirs.items()}
+
+@pytest.fixture
+def mounts(monkeypatch):
+    """Isolate the module-level snapshot mounts and close them afterwards"""
+    monkeypatch.setattr(cache_utils, '_snapshots', {})
+    monkeypatch.setattr(cache_utils, '_mounted', {})
+    monkeypatch.setattr(cache_utils, '_memory_cache', {})
+    yield cache_utils._mounted
+    for reader in cache_utils._mounted.values():
+        reader.close()
+
+def test_export_round_trip(tmp_path, namespaces):
+    old = time.time() - 100
+    _write_entry(namespaces['routes'], 'a_b_fastest', {'distance': 12.5, 'name': 'نابلس'}, old)
+    _write_entry(namespaces['cities'], 'nablus', [{'name': 'Nablus'}], old)
+
+    path = str(tmp_path / 'base.snap')
+    assert export_snapshot(path, namespaces) == 2
+
+    reader = SnapshotReader(path)
+    try:
+        assert len(reader) == 2
+        assert reader.base_created is None
+        assert reader.get('routes', 'a_b_fastest') == {'distance': 12.5, 'name': 'نابلس'}
+        assert reader.get('cities', 'nablus') == [{'name': 'Nablus'}]
+        assert reader.get('routes', 'missing') is None
+        assert {(namespace, key) for namespace, key, _, _ in reader.items()} == {
+            ('routes', 'a_b_fastest'), ('cities', 'nablus')
+        }
+    finally:
+        reader.close()
+
+def test_rejects_non_snapshot(tmp_path):
+    path = tmp_path / 'bogus.snap'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
+
+def test_incremental_export_with_base(tmp_path, namespaces, monkeypatch):
+    _write_entry(namespaces['routes'], 'old', {'v': 1}, time.time() - 100)
+    base = str(tmp_path / 'base.snap')
+    incremental = str(tmp_path / 'incremental.snap')
+
+    monkeypatch.setattr('app.commands.CACHE_NAMESPACES', namespaces)
+    runner = create_app().test_cli_runner()
+    result = runner.invoke(args=['cache', 'export', base])
+    assert result.exit_code == 0, result.output
+
+    _write_entry(namespaces['routes'], 'new', {'v': 2}, time.time() + 100)
+    result = runner.invoke(args=['cache', 'export', incremental, '--base', base])
+    assert result.exit_code == 0, result.output
+    assert 'Exported 1 entries' in result.output
+
+    base_reader = SnapshotReader(base)
+    reader = SnapshotReader(incremental)
+    try:
+        assert reader.base_created == base_reader.created
+        assert reader.get('routes', 'new') == {'v': 2}
+        assert reader.get('routes', 'old') is None
+    finally:
+        reader.close()
+        base_reader.close()
+
+def test_read_cache_from_mounted_snapshots(tmp_path, namespaces, mounts):
+    old = time.time() - 100
+    _write_entry(namespaces['routes'], 'shared', {'v': 'base'}, old)
+    _write_entry(namespaces['routes'], 'base_only', {'v': 'base'}, old)
+    base = str(tmp_path / 'base.snap')
+    export_snapshot(base, namespaces)
+
+    _write_entry(namespaces['routes'], 'shared', {'v': 'incremental'}, time.time() + 100)
+    base_reader = SnapshotReader(base)
+    incremental = str(tmp_path / 'incremental.snap')
+    try:
+        export_snapshot(incremental, namespaces, base_reader)
+    finally:
+        base_reader.close()
+
+    # Serve everything from the snapshots, incremental first
+    for file in os.listdir(namespaces['routes']):
+        os.remove(os.path.join(namespaces['routes'], file))
+    mount_snapshot(incremental, namespaces)
+    mount_snapshot(base, namespaces)
+
+    assert read_cache('shared', namespaces['routes']) == {'v': 'incremental'}
+    assert read_cache('base_only', namespaces['routes']) == {'v': 'base'}
+    assert read_cache('missing', namespaces['routes']) is None
+
+    # Files on disk take precedence over the snapshots
+    _write_entry(namespaces['routes'], 'shared', {'v': 'disk'}, time.time())
+    assert read_cache('shared', namespaces['routes']) == {'v': 'disk'}
+
+def test_mount_snapshot_is_idempotent(tmp_path, namespaces, mounts):
+    _write_entry(namespaces['routes'], 'key', {'v': 1}, time.time() - 100)
+    path = str(tmp_path / 'base.snap')
+    export_snapshot(path, namespaces)
+
+    reader = mount_snapshot(path, namespaces)
+    assert mount_snapshot(os.path.relpath(path), namespaces) is reader
+    assert cache_utils._snapshots[namespaces['routes']] == [('routes', reader)]